@@ -9,9 +9,6 @@ setup(name='straight.command',
     author_email='ironfroggy@gmail.com',
     url='https://github.com/ironfroggy/straight.plugin',
     packages=['straight', 'straight.command'],
-    install_requires=[
-        'straight.plugin',
-    ],
     classifiers=[
         'Programming Language :: Python :: 2',
         'Programming Language :: Python :: 3',
@@ -1 +1,19 @@
-__import__('pkg_resources').declare_namespace(__name__)
+def _extend_path(path, name):
+    """Let other distributions install into the straight namespace.
+
+    This does what pkgutil.extend_path() does for a plain sys.path, without
+    importing pkgutil, which costs more to import than all of
+    straight.command.
+    """
+
+    import os
+    import sys
+    for entry in sys.path:
+        if isinstance(entry, str):
+            entry = os.path.join(entry or os.curdir, name)
+            if entry not in path and os.path.isdir(entry):
+                path.append(entry)
+    return path
+
+__path__ = _extend_path(__path__, __name__)
+del _extend_path
@@ -4,11 +4,17 @@
 
 from __future__ import print_function
 
+import errno
+import os
 import sys
-import re
-from itertools import chain
+import time
+from functools import partial
 
-from straight.plugin import load
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
 
 
 class InvalidArgument(ValueError):
@@ -19,6 +25,201 @@ class UnknownArguments(ValueError):
     """Raised when an argment does not match any expected options."""
 
 
+class DeadlineExceeded(Exception):
+    """Raised when a command runs past its deadline. `phase` names the
+    phase which was running, prefixed by the names of any subcommands.
+    """
+
+    def __init__(self, phase):
+        super(DeadlineExceeded, self).__init__(phase)
+        self.phase = phase
+
+
+class InvalidCommand(ValueError):
+    """Raised when the options of a command are declared inconsistently."""
+
+
+class RunResult(object):
+    """The outcome of one invocation made by `Command.run_many()`.
+
+    - `argv` the argument list which was run
+    - `value` whatever the command's run-phase returned
+    - `status` the exit status, as `sys.exit()` would have reported it
+    - `stdout` and `stderr` the output captured during the invocation
+    - `error` the argument error which stopped parsing, or the exception
+      which stopped the run, if any
+    """
+
+    def __init__(self, argv, value=None, status=0, stdout='', stderr='',
+                 error=None):
+        self.argv = argv
+        self.value = value
+        self.status = status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.error = error
+
+    def __repr__(self):
+        return "<RunResult: {0.argv} status={0.status}>".format(self)
+
+
+def _exit_status(code, stderr):
+    """Translate a `SystemExit` code the way the interpreter would."""
+
+    if code is None:
+        return 0
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        print(code, file=stderr)
+        return 1
+
+
+class Output(object):
+    """The output channel of a command, available as `cmd.out`.
+
+    Text written to it, with `write()` or with `print(..., file=cmd.out)`,
+    and binary data written with `write_bytes()`, is collected until
+    `buffering` characters or bytes are waiting and then written to standard
+    output at once. A `buffering` of zero writes through immediately. Whole
+    files can be written with `send_file()`.
+
+    Standard output is looked up when the buffer is flushed, so output is
+    captured by anything which replaces `sys.stdout`. When it has no binary
+    buffer, binary data is decoded in its encoding.
+    """
+
+    def __init__(self, buffering=8192, stream=None):
+        self.buffering = buffering
+        self._stream = stream
+        self._chunks = []
+        self._size = 0
+        self._decoder = None
+
+    @property
+    def stream(self):
+        if self._stream is not None:
+            return self._stream
+        return sys.stdout
+
+    def replay(self, chunks):
+        """Write a list of text and bytes chunks, in order."""
+
+        for chunk in chunks:
+            if _is_bytes(chunk):
+                self.write_bytes(chunk)
+            else:
+                self.write(chunk)
+
+    def write(self, text):
+        self._buffer(text)
+
+    def write_bytes(self, data):
+        """Write binary data, after anything already written."""
+
+        self._buffer(data)
+
+    def _buffer(self, chunk):
+        if self.buffering <= 0:
+            self._emit([chunk])
+            return
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self.buffering:
+            self.flush()
+
+    def _emit(self, chunks):
+        """Write `chunks` to the stream, joining runs of text and of bytes."""
+
+        stream = self.stream
+        binary = getattr(stream, 'buffer', None)
+        start = 0
+        while start < len(chunks):
+            is_bytes = _is_bytes(chunks[start])
+            end = start + 1
+            while end < len(chunks) and _is_bytes(chunks[end]) == is_bytes:
+                end += 1
+            run = chunks[start:end]
+            start = end
+            if not is_bytes:
+                stream.write(''.join(run))
+            elif binary is not None:
+                stream.flush()
+                binary.write(b''.join(run))
+            else:
+                stream.write(self._decode(b''.join(run), stream))
+
+    def _decode(self, data, stream, final=False):
+        # Kept between writes, so characters split across them survive
+        if self._decoder is None:
+            import codecs
+            encoding = getattr(stream, 'encoding', None) or 'utf-8'
+            self._decoder = codecs.getincrementaldecoder(encoding)('replace')
+        text = self._decoder.decode(data, final)
+        if final:
+            self._decoder = None
+        return text
+
+    def send_file(self, path, chunk_size=65536):
+        """Write the contents of the file at `path`.
+
+        When standard output is a real file descriptor the data is copied
+        by the kernel with `os.sendfile()`, without passing through Python,
+        and otherwise it is copied in chunks of `chunk_size` bytes.
+        """
+
+        self.flush()
+        with open(path, 'rb') as f:
+            if not self._sendfile(f):
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    self.write_bytes(data)
+        self.flush()
+        if self._decoder is not None:
+            self.stream.write(self._decode(b'', self.stream, final=True))
+
+    def _sendfile(self, f):
+        sendfile = getattr(os, 'sendfile', None)
+        if sendfile is None:
+            return False
+        try:
+            out_fd = self.stream.fileno()
+        except (AttributeError, ValueError, EnvironmentError):
+            return False
+        in_fd = f.fileno()
+        offset = 0
+        while True:
+            try:
+                sent = sendfile(out_fd, in_fd, offset, 1 << 30)
+            except EnvironmentError as e:
+                if offset == 0 and e.errno in (errno.EINVAL, errno.ENOSYS):
+                    return False
+                raise
+            if sent == 0:
+                return True
+            offset += sent
+
+    def flush(self):
+        chunks = self._chunks
+        self._chunks = []
+        self._size = 0
+        self._emit(chunks)
+        self.stream.flush()
+
+
+def _is_bytes(chunk):
+    return isinstance(chunk, bytes) and not isinstance(chunk, str)
+
+
+def _run_batch(job):
+    """Run a chunk of `run_many()` in a worker process."""
+
+    command_class, argvs = job
+    return command_class()._run_many(argvs)
+
+
 class _FLAG(object):
     def __init__(self, f=True):
         self.f = f
@@ -26,6 +227,8 @@ class _FLAG(object):
         return bool(self.f)
     __nonzero__ = __bool__
 
+_clock = getattr(time, 'perf_counter', time.time)
+
 _NO_CONST = _FLAG()
 _NO_DEFAULT = _FLAG(False)
 _NO_VALUE = _FLAG(False)
@@ -70,41 +273,77 @@ class Command(object):
     version = "unknown"
     subcommand = None # 'required' or default
     default = False # If this is a default subcommand
-    option_ns = None # Defines secondary plugin namespace
+    option_ns = None # Defines secondary plugin namespace, or namespaces
+    discovery_workers = None # Threads to search plugin namespaces with
+    deadline_status = 124 # Exit status when a deadline is exceeded
+    phase_budgets = None # Shares of the deadline for parse, options, execute
+    output_buffering = 8192 # Characters of output to buffer in `out`
+    config_files = () # Config files to read option values from
+    config_section = None # Section of the config files, or the class name
+    config_cache_dir = None # Where parsed config snapshots are kept
+    env_prefix = None # Prefix of environment variables for option values
+    telemetry_log = None # File to record the latency of each run in
+    needs = None # Dests `execute()` reads from its keyword arguments
+    cacheable = False # If the output only depends on arguments and inputs
+    cache_inputs = () # Dests holding paths of input files, for cacheable
+    cache_hash_inputs = False # Hash inputs, rather than checking mtimes
+    cache_dir = None # Where cached results are kept
+    cache_size = 64 * 1024 * 1024 # Bytes of cached results to keep
 
     def __init__(self, parent=None):
+        start = _clock()
         self.parent = parent
+        # Subcommands share their parent's output, so it stays in order
+        self.out = getattr(parent, 'out', None)
+        if self.out is None:
+            self.out = Output(self.output_buffering)
         self.options = []
         self.consumers = []
         self.args = Arguments(parent=parent)
 
         self.ran_subcommand = None
-
-        self.loadOptions('straight.command')
-        if self.option_ns:
-            self.loadOptions(self.option_ns)
+        self.argv = None
+        self._deadline = None
+        self._budget = None
+        self._phase_deadline = None
+
+        namespaces = ['straight.command']
+        if isinstance(self.option_ns, _string_types):
+            namespaces.append(self.option_ns)
+        elif self.option_ns:
+            namespaces.extend(self.option_ns)
+        self.loadOptions(namespaces)
+        if self.cacheable:
+            self.options.append(NoCacheOption())
 
         self.options.sort(key=lambda opt: opt.index_for(self))
+        self._plan = _RunPlan(self.options, _consumed_by(self))
+        # Seconds spent in each phase of the latest run
+        self.timings = {'load': _clock() - start}
 
     def loadOptions(self, namespace):
-        """Load options from a plugin namespace, and also from any options
-        defined as part of the class body.
+        """Load options from one or more plugin namespaces, and also from
+        any options defined as part of the class body.
 
         The namespace is used to search all your available python packages
         and locate anything within that namespace. By default, the namespace
-        ``"straight.command"`` is used to locate default options, which
-        are found in the ``straight.command.default_options`` module.
+        ``"straight.command"`` is used to load the default options, which
+        are listed in the ``straight.command.default_options`` module and
+        loaded without searching.
 
         Your application can define its own namespace where you can easily
         add options to be located, and if you document this namespace other
         developers can extend your commands with new options by providing
-        namespace packages with their own options plugins.
+        namespace packages with their own options plugins. All the
+        namespaces given are searched together, in a single pass.
         """
 
+        if isinstance(namespace, _string_types):
+            namespace = [namespace]
+
         from_attributes = self._getAttributes(Option)
         from_nested_commands = self._getAttributes(sub=Command)
-        from_plugins = self._getPlugins(namespace, Option)
-        from_plugins_subcmds = self._getPlugins(namespace, SubCommand)
+        from_plugins, from_plugins_subcmds = self._getPlugins(namespace)
 
         nested_subcommands = []
         for command in from_nested_commands:
@@ -118,12 +357,24 @@ class Command(object):
         self.options.extend(nested_subcommands)
         self.options.extend(from_plugins)
 
-    def _getPlugins(self, namespace, cls):
-        """Utility to load and instansiate a set of plugins."""
+    def _getPlugins(self, namespaces):
+        """Utility to load and instansiate the option and subcommand plugins
+        of a set of namespaces.
+        """
 
-        for plugin in load(namespace, subclasses=cls):
-            if plugin.__module__ != "straight.command":
-                yield plugin()
+        options = []
+        subcommands = []
+        if 'straight.command' in namespaces:
+            from straight.command.default_options import DEFAULT_OPTIONS
+            options.extend(DEFAULT_OPTIONS)
+            namespaces = [ns for ns in namespaces if ns != 'straight.command']
+        if namespaces:
+            from straight.command.discovery import discover
+            found_options, subcommands = discover(namespaces,
+                                                  self.discovery_workers)
+            options.extend(found_options)
+        return ([plugin() for plugin in options],
+                [plugin() for plugin in subcommands])
 
     def _getAttributes(self, cls=None, sub=None):
         """Utility to locate class-defined options."""
@@ -131,6 +382,9 @@ class Command(object):
         assert cls or sub
 
         for name in dir(self):
+            if name.startswith('__'):
+                # Not least `__class__`, which would nest a command in itself
+                continue
             value = getattr(self, name)
             if cls:
                 if isinstance(value, cls):
@@ -139,8 +393,45 @@ class Command(object):
                 if isinstance(value, type) and issubclass(value, sub):
                     yield value
 
+    def sources(self):
+        """Collect option values from config files and the environment,
+        which take the place of the options' defaults.
+
+        Each file in `config_files` is read in turn, followed by the
+        environment, with later sources overriding earlier ones. A
+        subcommand reads the files and environment prefix of its parents
+        as well as its own, taking values from its own `config_section`,
+        and keeps snapshots in the nearest `config_cache_dir` set.
+        """
+
+        files = []
+        env_prefix = None
+        cache_dir = None
+        cmd = self
+        while isinstance(cmd, Command):
+            files[:0] = cmd.config_files
+            env_prefix = env_prefix or cmd.env_prefix
+            cache_dir = cache_dir or cmd.config_cache_dir
+            cmd = cmd.parent
+
+        values = {}
+        if files:
+            from straight.command.sources import read_config
+            section = self.config_section or self.__class__.__name__.lower()
+            for path in files:
+                values.update(read_config(path, section, self.options,
+                                          cache_dir))
+        if env_prefix or any(opt.env for opt in self.options):
+            from straight.command.sources import read_environ
+            values.update(read_environ(self.options, env_prefix))
+        return values
+
     def parse(self, arguments):
-        """Parse all known arguments, populating the `args` dict."""
+        """Parse all known arguments, populating the `args` dict.
+
+        Options not given on the command line take their values from
+        `sources()`, if it has one, and otherwise from their default.
+        """
 
         arguments = list(arguments)
 
@@ -168,6 +459,13 @@ class Command(object):
         if arguments:
             raise UnknownArguments(arguments)
 
+        sources = self.sources()
+        if sources:
+            matched = set(c.option.dest for c in consumers if c.matched)
+            for dest in sources:
+                if dest not in matched:
+                    self.args[dest] = sources[dest]
+
     def _parse_one(self, consumers):
         """Allow each option, in order, to consume arguments from the list if
         they match its criteria.
@@ -176,16 +474,188 @@ class Command(object):
         c = consumers[0].remaining()
         for consumer in consumers:
             if consumer.nargs and consumer.option.parse(consumer, self.args):
+                consumer.matched = True
                 break
         return c != consumers[0].remaining()
 
-    def run(self, arguments=None):
-        """Parse arguments and invoke resulting actions."""
+    def run(self, arguments=None, deadline=None):
+        """Parse arguments and invoke resulting actions.
+
+        Returns whatever the run-phase returned, which is the result of
+        `execute()` or of the short circuit option which ran instead.
+
+        If a `deadline` is given, or a ``--deadline`` on the command line,
+        the command must finish within that many seconds, counted from this
+        call, so loading the command's own options is not included. The
+        deadline is checked after parsing, after each option runs, after
+        `execute()` returns, and whenever the command calls
+        `check_deadline()`, and subcommands are given what remains of it.
+        `phase_budgets` can also limit the ``parse``, ``options`` and
+        ``execute`` phases to a share of the deadline each, where options
+        include any subcommand. When a deadline passes, the phase which
+        overran is reported and the command exits with `deadline_status`.
+        """
 
         if arguments is None:
             arguments = sys.argv[1:]
-        self.parse(arguments)
-        self._run()
+        self.argv = list(arguments)
+        self._started = _clock()
+        self._deadline = self._budget = None
+        if deadline is not None:
+            self._deadline = self._started + deadline
+            self._budget = deadline
+        self._start_phase('parse')
+        if self.telemetry_log is not None and self.parent is None:
+            from straight.command.telemetry import record_run
+            return record_run(self, self.argv, self._parse_and_run)
+        return self._parse_and_run(self.argv)
+
+    def _parse_and_run(self, arguments):
+        try:
+            self.parse(arguments)
+            self.timings['parse'] = _clock() - self._started
+            deadline = self.args.get('deadline')
+            if self._deadline is None and deadline is not _NO_VALUE \
+                    and deadline is not None:
+                self._deadline = self._started + deadline
+                self._budget = deadline
+            self.check_deadline('parse')
+            return self._run()
+        except DeadlineExceeded as e:
+            if self.parent is not None:
+                raise
+            print("Deadline exceeded during {0}".format(e.phase),
+                  file=sys.stderr)
+            sys.exit(self.deadline_status)
+
+    def _start_phase(self, phase):
+        """Begin `phase`, giving it its share of the deadline, if any."""
+
+        self._phase_deadline = None
+        share = (self.phase_budgets or {}).get(phase)
+        if share is not None and self._budget is not None:
+            self._phase_deadline = _clock() + share * self._budget
+
+    def _deadlines(self):
+        return [d for d in (self._deadline, self._phase_deadline)
+                if d is not None]
+
+    def remaining(self):
+        """Seconds left before the deadline, or the end of the current
+        phase's budget if that is sooner. None if there is neither.
+        """
+
+        deadlines = self._deadlines()
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - _clock())
+
+    def check_deadline(self, phase='execute'):
+        """Raise `DeadlineExceeded` if the deadline, or the budget of the
+        current phase, has passed. Commands with long running work should
+        call this from time to time, to be cancelled when they run out of
+        time.
+        """
+
+        deadlines = self._deadlines()
+        if deadlines and _clock() > min(deadlines):
+            raise DeadlineExceeded(phase)
+
+    def reset(self):
+        """Forget the state of any previous invocation, so the same command
+        and its loaded options can be parsed and run again.
+        """
+
+        self.args = Arguments(parent=self.parent)
+        self.ran_subcommand = None
+        self.argv = None
+        self.timings = {}
+        self._deadline = self._budget = self._phase_deadline = None
+        for opt in self.options:
+            if isinstance(opt, SubCommand):
+                opt.subcmd_args = None
+
+    def shell(self, prompt=None, stdin=None, history_file=None):
+        """Run the command interactively, once for each line entered, until
+        the input ends or ``exit`` is entered.
+
+        The command and its subcommands are loaded once and reused for
+        every line. Option flags and subcommand names complete with the tab
+        key, and lines are kept in `history_file` if one is given. A
+        `SystemExit` or argument error is reported without ending the
+        session. Lines are read from `stdin` instead, if it is given.
+        """
+
+        from straight.command.shell import shell
+        shell(self, prompt, stdin, history_file)
+
+    def run_many(self, argvs, processes=None):
+        """Run the command once for each argument list in `argvs`, and
+        return a list of `RunResult`, in the same order.
+
+        Output is captured rather than written, and `SystemExit` is caught
+        and reported as the `status` of the result, so a batch is never
+        interrupted by one invocation. Argument errors are reported in the
+        same way, with a status of 2, and any other exception with a status
+        of 1, its traceback written to the captured `stderr`.
+
+        The options loaded for this command are reused for every
+        invocation. If `processes` is given, the batch is instead split
+        across that many worker processes, each of which loads its own
+        instance of this command's class; in that case the run-phase
+        return values must be picklable.
+        """
+
+        argvs = [list(argv) for argv in argvs]
+        if not processes or processes < 2 or len(argvs) < 2:
+            return self._run_many(argvs)
+
+        from multiprocessing import Pool
+
+        size = -(-len(argvs) // processes)
+        jobs = [(self.__class__, argvs[i:i + size])
+                for i in range(0, len(argvs), size)]
+        pool = Pool(len(jobs))
+        try:
+            chunks = pool.map(_run_batch, jobs)
+        finally:
+            pool.close()
+            pool.join()
+        return [result for chunk in chunks for result in chunk]
+
+    def _run_many(self, argvs):
+        return [self._run_captured(argv) for argv in argvs]
+
+    def _run_captured(self, argv):
+        """Run one invocation with its output and exit status captured."""
+
+        try:
+            from cStringIO import StringIO
+        except ImportError:
+            from io import StringIO
+
+        result = RunResult(argv)
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = out, err = StringIO(), StringIO()
+        try:
+            self.reset()
+            try:
+                result.value = self.run(argv)
+            except SystemExit as e:
+                result.status = _exit_status(e.code, err)
+            except (InvalidArgument, UnknownArguments) as e:
+                result.error = e
+                result.status = 2
+            except Exception as e:
+                import traceback
+                traceback.print_exc(file=err)
+                result.error = e
+                result.status = 1
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        result.stdout = out.getvalue()
+        result.stderr = err.getvalue()
+        return result
 
     def before_opts(self):
         pass
@@ -195,51 +665,163 @@ class Command(object):
         is matched, it will be run and nothing else. Otherwise, all options
         will be run, then the command's `execute` will be called with
         the resulting parsed arguments as keyword arguments.
+
+        Matched options which define `around_run()` wrap all of this, and
+        anything left buffered in `out` is flushed when the run is over.
         """
 
+        run = self._run_options
+        for opt in self._plan.wrappers:
+            if self.args.get(opt.dest):
+                run = partial(opt.around_run, self, run)
+        try:
+            return run()
+        finally:
+            self.out.flush()
+
+    def _run_options(self):
+        plan = self._plan
         short_circuit = None
-        for opt in self.options:
-            if opt.short_circuit and self.args[opt.dest]:
+        for opt in plan.short_circuit:
+            if self.args[opt.dest]:
                 if short_circuit is None:
                     short_circuit = opt
                 else:
                     raise ValueError("More than one short circuit option!"
                         "Cannot mix {0} and {1}!".format(short_circuit, opt))
 
+        self._start_phase('options')
         self.before_opts()
 
         if short_circuit is not None:
-            short_circuit.run(self)
+            start = _clock()
+            try:
+                return short_circuit.run(self)
+            finally:
+                self.timings['options'] = _clock() - start
+        elif self.cacheable and not self.args.get('no_cache'):
+            from straight.command.cache import cached_run
+            return cached_run(self, self._run_all)
         else:
-            for opt in self.options:
-                if not opt.short_circuit:
-                    opt.run(self)
-
-            for opt in self.options:
-                if opt.dest and self.args[opt.dest] is _NO_DEFAULT:
-                    del self.args[opt.dest]
-
-            self.execute(**self.args)
+            return self._run_all()
+
+    def _run_all(self):
+        plan = self._plan
+        start = _clock()
+        for opt in plan.runnable:
+            opt.run(self)
+            self.check_deadline('option {0}'.format(
+                opt.dest or opt.__class__.__name__))
+
+        for dest in plan.dests:
+            if self.args[dest] is _NO_DEFAULT:
+                del self.args[dest]
+
+        options_done = _clock()
+        self.timings['options'] = options_done - start
+        self._start_phase('execute')
+        try:
+            value = self.execute(**self.args)
+        finally:
+            self.timings['execute'] = _clock() - options_done
+        self.check_deadline('execute')
+        return value
 
     def execute(self, **kwargs):
         if not self.ran_subcommand:
-            default_subcommand = None
-            for opt in self.options:
-                if isinstance(opt, SubCommand) and opt.command_class.default:
-                    if default_subcommand is None:
-                        default_subcommand = opt
-                    else:
-                        print("Error: Found conflicting default subcommands!")
-                        sys.exit(1)
+            default_subcommand = self._plan.default_subcommand
             if default_subcommand is None:
                 if self.subcommand == 'required':
-                    for opt in self.options:
-                        if opt.long == '--help':
-                            opt.run(self)
-                            break
+                    if self._plan.help is not None:
+                        self._plan.help.run(self)
                     sys.exit(1)
             else:
-                default_subcommand.run(self, as_default=True)
+                return default_subcommand.run(self, as_default=True)
+
+
+def _overrides(obj, name):
+    """True if `obj` defines method `name` below the base `Option`."""
+
+    for klass in type(obj).__mro__:
+        if name in vars(klass):
+            return klass is not Option
+    return False
+
+
+_CO_VARKEYWORDS = 0x08
+
+
+def _logger():
+    # logging is imported on first use, as it costs more than the rest of
+    # this module to import, and is only needed to explain skipped options
+    import logging
+    return logging.getLogger(__name__)
+
+
+def _consumed_by(cmd):
+    """The names `cmd.execute()` accepts, along with its declared `needs`
+    if it takes any keyword arguments. None if there is no telling.
+    """
+
+    func = getattr(cmd.execute, '__func__', cmd.execute)
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    count = code.co_argcount + getattr(code, 'co_kwonlyargcount', 0)
+    names = code.co_varnames[1:count]
+    any_keyword = bool(code.co_flags & _CO_VARKEYWORDS)
+    if any_keyword:
+        if cmd.needs is None:
+            return None
+        names = list(names) + list(cmd.needs)
+    return frozenset(names)
+
+
+class _RunPlan(object):
+    """Everything the run-phase needs to know about a command's options,
+    worked out once when the command is created rather than on every run.
+
+    - `short_circuit` the options which may run alone
+    - `runnable` the other options which define their own `run()`, less
+      any lazy options whose values are not among the `consumed` dests
+    - `dests` every destination the options store values to
+    - `default_subcommand` the subcommand to run when none is given
+    - `help` the option which prints help, if any
+    - `wrappers` the options which define their own `around_run()`
+    """
+
+    def __init__(self, options, consumed=None):
+        self.short_circuit = []
+        self.runnable = []
+        self.dests = []
+        self.default_subcommand = None
+        self.help = None
+        self.wrappers = []
+
+        for opt in options:
+            if _overrides(opt, 'around_run'):
+                self.wrappers.append(opt)
+            if opt.short_circuit:
+                self.short_circuit.append(opt)
+            elif _overrides(opt, 'run'):
+                provides = opt.provides or (opt.dest,)
+                if (opt.lazy and consumed is not None
+                        and consumed.isdisjoint(provides)):
+                    _logger().debug(
+                        "Skipping %r, as nothing uses %s",
+                        opt, ', '.join(map(str, provides)))
+                else:
+                    self.runnable.append(opt)
+            if opt.dest and opt.dest not in self.dests:
+                self.dests.append(opt.dest)
+            if opt.long == '--help' and self.help is None:
+                self.help = opt
+            if isinstance(opt, SubCommand) and opt.command_class.default:
+                if self.default_subcommand is not None:
+                    raise InvalidCommand("Found conflicting default "
+                        "subcommands {0.name!r} and {1.name!r}!"
+                        .format(self.default_subcommand, opt))
+                self.default_subcommand = opt
 
 
 class Consumer(object):
@@ -251,6 +833,7 @@ class Consumer(object):
         self.option = option
         self.nargs = option.nargs
         self.args = args
+        self.matched = False
 
     def __repr__(self):
         return "<Consumer: {0.option} dest={0.option.dest}>".format(self)
@@ -294,6 +877,12 @@ class Consumer(object):
             raise InvalidArgument(value)
 
 
+def _is_word(char):
+    """Like matching `char` against the regular expression ``\\w``."""
+
+    return char.isalnum() or char == '_'
+
+
 class Option(object):
     """Defines a single option a command can take.
 
@@ -313,6 +902,9 @@ class Option(object):
     - `coerce` a callable accepting the given string value for an option, and
       returning a value of a correct type
     - `short_circuit` true if the option can be the only one run
+    - `env` an optional environment variable to read a value from
+    - `lazy` true if `run()` can be skipped when nothing uses its values
+    - `provides` the dests `run()` stores values to, if not only `dest`
     """
 
     _DEFAULT = {
@@ -331,6 +923,9 @@ class Option(object):
         ('const', _NO_CONST),
         ('default', _NO_DEFAULT),
         ('help', ''),
+        ('env', None),
+        ('lazy', False),
+        ('provides', None),
     )
 
     __counter = 0
@@ -368,9 +963,11 @@ class Option(object):
             self.positional = True
         else:
             self.positional = False
-        if self.short and not re.match(r'-\w[\w\-]*', self.short):
+        if self.short and not (self.short[:1] == '-' and
+                               _is_word(self.short[1:2])):
             raise ValueError("Short option must begin with - only.")
-        if self.long and not re.match(r'--\w[\w\-]*', self.long):
+        if self.long and not (self.long[:2] == '--' and
+                              _is_word(self.long[2:3])):
             raise ValueError("Long option must begin with -- only.")
         try:
             int(self.nargs)
@@ -446,6 +1043,44 @@ class Option(object):
                 value = consumer.consume(mode)
                 ns[self.dest].append(value)
 
+    def from_source(self, value):
+        """Convert a value read from a config file or the environment.
+
+        Strings are coerced like values on the command line, flags accept
+        the usual spellings of true, and appended options split strings on
+        commas.
+        """
+
+        try:
+            if self.action in ('store_true', 'store_false'):
+                if not isinstance(value, _string_types):
+                    return bool(value)
+                return value.strip().lower() in ('1', 'true', 'yes', 'on')
+            if self.action == 'append':
+                if isinstance(value, _string_types):
+                    values = [v.strip() for v in value.split(',')]
+                elif isinstance(value, (list, tuple)):
+                    values = value
+                else:
+                    values = [value]
+                return [self._coerce_source(v) for v in values]
+            return self._coerce_source(value)
+        except ValueError:
+            raise InvalidArgument(value)
+
+    def _coerce_source(self, value):
+        if isinstance(value, _string_types):
+            return self.coerce(value)
+        return value
+
+    def around_run(self, cmd, run):
+        """An Option subclass can define `around_run()` to wrap the entire
+        run-phase of the command, including any subcommand, if the option
+        had been matched. It must call `run()` and return its result.
+        """
+
+        return run()
+
     def run(self, cmd):
         """An Option subclass can define `run()` to invoke some behavior
         during the commands run-phase, if the option had been matched.
@@ -454,6 +1089,16 @@ class Option(object):
         return NotImplemented
 
 
+class NoCacheOption(Option):
+    """Added to cacheable commands, to run them without the cache."""
+
+    long = '--no-cache'
+    dest = 'no_cache'
+    action = 'store_true'
+
+    help = "Run the command, rather than replaying a cached result."
+
+
 class SubCommand(Option):
     """Implements a "sub-command option", which consumes all the remaining
     options and delegates them to another Command.
@@ -505,6 +1150,16 @@ class SubCommand(Option):
         if as_default:
             self.subcmd_args = []
         if self.subcmd_args is not None:
-            self.subcmd = self.command_class(parent=cmd)
-            self.subcmd.run(self.subcmd_args)
+            # Reuse the loaded subcommand when the same parent runs again
+            if self.subcmd is None or self.subcmd.parent is not cmd:
+                self.subcmd = self.command_class(parent=cmd)
+            else:
+                self.subcmd.reset()
             cmd.ran_subcommand = self.subcmd
+            cmd.check_deadline('{0} load'.format(self.name))
+            try:
+                return self.subcmd.run(self.subcmd_args,
+                                       deadline=cmd.remaining())
+            except DeadlineExceeded as e:
+                e.phase = '{0} {1}'.format(self.name, e.phase)
+                raise
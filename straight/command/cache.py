@@ -0,0 +1,171 @@
+"""Caching the results of cacheable commands.
+
+A result is keyed by the command's class and version, the arguments it was
+run with and the parsed arguments of its parents, and the state of any
+input files named by the dests in `cache_inputs`. It holds everything the
+command wrote to standard output, through `cmd.out` or not, along with its
+exit status and the value it returned, which are replayed on a hit instead
+of running the command. The cache directory is kept under `cache_size`
+bytes by removing the least recently used results.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+
+from straight.command import Command, _FLAG
+from straight.command.sources import default_cache_dir
+
+
+def _value_key(value):
+    if isinstance(value, _FLAG):
+        return None
+    return value
+
+
+class _Tee(object):
+    """Passes writes on to `stream`, keeping a copy of each in `chunks`.
+
+    It has no file descriptor, so nothing can be written around it.
+    """
+
+    def __init__(self, stream, chunks):
+        self._stream = stream
+        self._chunks = chunks
+        binary = getattr(stream, 'buffer', None)
+        if binary is not None:
+            self.buffer = _Tee(binary, chunks)
+
+    def write(self, data):
+        self._chunks.append(data)
+        return self._stream.write(data)
+
+    def fileno(self):
+        raise io.UnsupportedOperation("fileno")
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def input_state(cmd, path):
+    """What identifies the contents of an input file."""
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None)
+    if not cmd.cache_hash_inputs:
+        return (path, st.st_mtime, st.st_size)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return (path, digest.hexdigest())
+
+
+def cache_key(cmd):
+    args = []
+    inputs = []
+    current = cmd
+    while isinstance(current, Command):
+        args.append(sorted((dest, repr(_value_key(value)))
+                           for dest, value in dict.items(current.args)
+                           if dest != 'no_cache'))
+        # The parsed arguments leave out those given to subcommands
+        args.append(current.argv)
+        current = current.parent
+    for dest in cmd.cache_inputs:
+        paths = cmd.args.get(dest)
+        if isinstance(paths, _FLAG) or not paths:
+            continue
+        if not isinstance(paths, (list, tuple)):
+            paths = [paths]
+        inputs.extend(input_state(cmd, path) for path in paths)
+
+    ident = (cmd.__class__.__module__, cmd.__class__.__name__, cmd.version,
+             args, inputs)
+    return hashlib.sha256(repr(ident).encode('utf-8')).hexdigest()
+
+
+def cached_run(cmd, run):
+    """Replay the cached result of `cmd` if there is one, and otherwise
+    call `run()` and cache what it writes, returns and how it exits.
+    """
+
+    cache_dir = cmd.cache_dir or os.path.join(default_cache_dir(), 'results')
+    path = os.path.join(cache_dir, cache_key(cmd) + '.pickle')
+
+    try:
+        with open(path, 'rb') as f:
+            status, output, value = pickle.load(f)
+    except Exception:
+        pass
+    else:
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        cmd.out.replay(output)
+        if status:
+            sys.exit(status)
+        return value
+
+    output = []
+    cmd.out.flush()
+    stdout, stream = sys.stdout, cmd.out._stream
+    tee = sys.stdout = _Tee(stdout, output)
+    if stream is not None:
+        cmd.out._stream = tee if stream is stdout else _Tee(stream, output)
+    try:
+        try:
+            value = run()
+        finally:
+            cmd.out.flush()
+            sys.stdout, cmd.out._stream = stdout, stream
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            store(path, e.code or 0, output, None, cmd.cache_size)
+        raise
+    store(path, 0, output, value, cmd.cache_size)
+    return value
+
+
+def store(path, status, output, value, limit):
+    """Save a result atomically, then evict the least recently used results
+    until the cache directory holds no more than `limit` bytes.
+    """
+
+    cache_dir = os.path.dirname(path)
+    tmp = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with open(tmp, 'wb') as f:
+            pickle.dump((status, output, value), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pickle'):
+            try:
+                st = os.stat(os.path.join(cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+        total -= size
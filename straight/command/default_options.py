@@ -15,7 +15,7 @@ class VersionOption(Option):
     short_circuit = True
 
     def run(self, cmd):
-        print("Version {0}".format(cmd.version))
+        print("Version {0}".format(cmd.version), file=cmd.out)
 
 
 class Help(Option):
@@ -39,9 +39,9 @@ class Help(Option):
             return default
         def printhelps(opt, *props, **kwargs):
             indent = kwargs.get('indent', 0)
-            print(' ' * indent, end='')
+            print(' ' * indent, end='', file=cmd.out)
             for prop in props:
-                print(help[prop].ljust(ml[prop]), end=' ')
+                print(help[prop].ljust(ml[prop]), end=' ', file=cmd.out)
 
         for opt in cmd.options:
             opt_help = {}
@@ -57,5 +57,43 @@ class Help(Option):
             helps.append(opt_help)
         for help in helps:
             printhelps(help, 'flags', 'default', 'name', 'desc')
-            print()
-        
+            print(file=cmd.out)
+
+
+class ProfileOption(Option):
+    long = '--profile'
+    dest = 'profile'
+
+    help = "Profile the command with cprofile, sample or tracemalloc."
+
+    modes = ('cprofile', 'sample', 'tracemalloc')
+
+    def coerce(self, value):
+        if value not in self.modes:
+            raise ValueError(value)
+        return value
+
+    def around_run(self, cmd, run):
+        from straight.command.profiling import profile
+        return profile(cmd, run, cmd.args[self.dest],
+                       cmd.args.get('profile_output'))
+
+
+class ProfileOutputOption(Option):
+    long = '--profile-output'
+    dest = 'profile_output'
+
+    help = "Where to write the results of --profile."
+
+
+class DeadlineOption(Option):
+    long = '--deadline'
+    dest = 'deadline'
+    coerce = float
+
+    help = "Seconds the command must finish within."
+
+
+# Loaded into every command directly, without searching the namespace
+DEFAULT_OPTIONS = (VersionOption, Help, ProfileOption, ProfileOutputOption,
+                   DeadlineOption)
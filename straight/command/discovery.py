@@ -0,0 +1,171 @@
+"""Finding option and subcommand plugins in namespace packages.
+
+Every namespace a command needs is searched in one pass over `sys.path`,
+importing each plugin module once and sorting the classes it exports into
+options and subcommands. Namespaces are laid out as for ``straight.plugin``:
+any module or package found in the namespace's directory, under any entry
+of `sys.path`, is a plugin module, and a module of the same name found
+earlier in `sys.path` wins. A plugin module, or a class in one, can name
+more namespaces to search in its ``__plugin__.imply_plugins``.
+
+What is found is remembered for as long as `sys.path` is unchanged, so only
+the first command to need a namespace pays to search it.
+"""
+
+import os
+import sys
+from importlib import import_module
+
+from straight.command import Option, SubCommand, _string_types
+
+
+_found = {}
+
+
+def _listdir(path):
+    """Names of the plugin modules in directory `path`."""
+
+    names = []
+    scandir = getattr(os, 'scandir', None)
+    try:
+        if scandir is not None:
+            entries = [(e.name, e.is_dir()) for e in scandir(path)]
+        else:
+            entries = [(name, os.path.isdir(os.path.join(path, name)))
+                       for name in os.listdir(path)]
+    except OSError:
+        return names
+    for name, is_dir in sorted(entries):
+        if is_dir:
+            if os.path.exists(os.path.join(path, name, '__init__.py')):
+                names.append(name)
+        else:
+            base, ext = os.path.splitext(name)
+            if ext == '.py' and base != '__init__':
+                names.append(base)
+    return names
+
+
+def _scan_entry(args):
+    """Plugin module names under one `sys.path` entry, by namespace."""
+
+    entry, namespaces = args
+    return [_listdir(os.path.join(entry, *ns.split('.'))) for ns in namespaces]
+
+
+def find_modules(namespaces, workers=None):
+    """Import the plugin modules of each namespace, visiting each entry of
+    `sys.path` only once. If `workers` is more than one, the entries are
+    listed in that many threads at once, which helps when they are on slow
+    or network filesystems.
+
+    Returns a list of modules for each namespace.
+    """
+
+    jobs = [(entry or '.', namespaces) for entry in sys.path]
+    if workers and workers > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(workers)
+        try:
+            listings = pool.map(_scan_entry, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        listings = [_scan_entry(job) for job in jobs]
+
+    modules = []
+    for i, ns in enumerate(namespaces):
+        seen = set()
+        found = []
+        for listing in listings:
+            for name in listing[i]:
+                if name in seen:
+                    continue
+                seen.add(name)
+                try:
+                    found.append(import_module(ns + '.' + name))
+                except ImportError:
+                    pass
+        modules.append(found)
+    return modules
+
+
+def _implied(module):
+    """The namespaces named by ``__plugin__.imply_plugins`` of `module`, or
+    of the classes defined in it.
+    """
+
+    owners = [module]
+    for name in dir(module):
+        value = getattr(module, name)
+        if isinstance(value, type) and value.__module__ == module.__name__:
+            owners.append(value)
+    namespaces = []
+    for owner in owners:
+        implied = getattr(getattr(owner, '__plugin__', None),
+                          'imply_plugins', ())
+        if isinstance(implied, _string_types):
+            implied = [implied]
+        namespaces.extend(implied)
+    return namespaces
+
+
+def _priority(cls):
+    return getattr(getattr(cls, '__plugin__', None), 'priority', 0.0)
+
+
+def classify(modules):
+    """Sort the public classes of `modules` into options and subcommands,
+    each in order of their ``__plugin__.priority``, highest first.
+    """
+
+    options = []
+    subcommands = []
+    for module in modules:
+        for name in dir(module):
+            if name.startswith('_'):
+                continue
+            value = getattr(module, name)
+            if not isinstance(value, type) or \
+                    value.__module__ == 'straight.command':
+                continue
+            if not getattr(getattr(value, '__plugin__', None), 'load', True):
+                continue
+            if issubclass(value, SubCommand):
+                if value not in subcommands:
+                    subcommands.append(value)
+            elif issubclass(value, Option):
+                if value not in options:
+                    options.append(value)
+    options.sort(key=_priority, reverse=True)
+    subcommands.sort(key=_priority, reverse=True)
+    return options, subcommands
+
+
+def discover(namespaces, workers=None):
+    """Find the option and subcommand classes in all of `namespaces`, and
+    in any namespaces their plugins imply.
+
+    Returns a list of option classes and a list of subcommand classes.
+    """
+
+    namespaces = tuple(namespaces)
+    key = (namespaces, tuple(sys.path))
+    found = _found.get(key)
+    if found is None:
+        modules = []
+        searched = set()
+        pending = namespaces
+        while pending:
+            searched.update(pending)
+            implied = []
+            for ns_modules in find_modules(pending, workers):
+                for module in ns_modules:
+                    modules.append(module)
+                    for ns in _implied(module):
+                        if ns not in searched and ns not in implied:
+                            implied.append(ns)
+            pending = tuple(implied)
+        found = _found[key] = classify(modules)
+    return found
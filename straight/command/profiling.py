@@ -0,0 +1,213 @@
+"""Profilers used by the ``--profile`` default option.
+
+Each profiler wraps the run-phase of a command, writes its results to a
+file, and prints a short summary to standard error.
+"""
+
+from __future__ import print_function
+
+import sys
+import threading
+import time
+
+from straight.command import SubCommand
+
+
+def profile(cmd, run, mode, output=None, top=20):
+    """Run `run()` under the profiler named by `mode` and return its
+    result. Results are written to `output`, or to a file named after the
+    command in the current directory.
+    """
+
+    profiler, ext = PROFILERS[mode]
+    if not output:
+        output = '{0}.{1}'.format(cmd.__class__.__name__.lower(), ext)
+    return profiler(cmd, run, output, top)
+
+
+def profile_cprofile(cmd, run, output, top):
+    """Deterministic profiling, saved as pstats."""
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return run()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output)
+        print("Profile written to {0}".format(output), file=sys.stderr)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats('cumulative').print_stats(top)
+
+
+class Sampler(threading.Thread):
+    """Samples the stack of the thread `thread_id` every `interval` seconds,
+    counting each distinct stack in folded form, outermost frame first.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        super(Sampler, self).__init__()
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{0} ({1}:{2})'.format(
+                    code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                folded = ';'.join(reversed(stack))
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def profile_sample(cmd, run, output, top):
+    """Low overhead sampling, saved as folded stacks, which flamegraph
+    tools accept as input.
+    """
+
+    sampler = Sampler(threading.current_thread().ident)
+    sampler.start()
+    try:
+        return run()
+    finally:
+        sampler.stop()
+        stacks = sorted(sampler.stacks.items(), key=lambda s: -s[1])
+        with open(output, 'w') as f:
+            for stack, count in stacks:
+                f.write('{0} {1}\n'.format(stack, count))
+
+        leaves = {}
+        for stack, count in stacks:
+            leaf = stack.rsplit(';', 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        total = sum(leaves.values()) or 1
+        print("{0} samples written to {1}".format(total, output),
+              file=sys.stderr)
+        for leaf, count in sorted(leaves.items(), key=lambda l: -l[1])[:top]:
+            print("{0:6.1%} {1}".format(count / float(total), leaf),
+                  file=sys.stderr)
+
+
+def _traces(tracemalloc):
+    """A snapshot of the traced allocations, less those of the profiler."""
+
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True),
+        tracemalloc.Filter(False, __file__),
+    ))
+
+
+def _phase_name(opt):
+    if isinstance(opt, SubCommand):
+        return 'subcommand {0}'.format(opt.name)
+    return 'option {0}'.format(opt.dest or opt.__class__.__name__)
+
+
+def _describe(stat):
+    """Describe a statistic by the most recent frame of its traceback."""
+
+    frame = stat.traceback[-1]
+    size = getattr(stat, 'size_diff', stat.size)
+    count = getattr(stat, 'count_diff', stat.count)
+    return "{0}:{1}: {2:.1f} KiB in {3} blocks".format(
+        frame.filename, frame.lineno, size / 1024.0, count)
+
+
+def _write_stats(stats, f):
+    for stat in stats:
+        print(_describe(stat), file=f)
+        for line in stat.traceback.format():
+            print('    ' + line, file=f)
+
+
+def profile_tracemalloc(cmd, run, output, top, frames=10):
+    """Allocation tracing, by phase and by traceback.
+
+    Each option and subcommand the command runs, and its `execute()`, is
+    measured as a phase of its own, with snapshots taken either side of it.
+    This reports the peak memory of each phase, including what it freed
+    again before it finished, and the tracebacks of what it kept.
+    """
+
+    import tracemalloc
+
+    reset_peak = getattr(tracemalloc, 'reset_peak', None)
+    phases = []
+
+    def measure(name, func):
+        def measured(*args, **kwargs):
+            before = _traces(tracemalloc)
+            if reset_peak is not None:
+                reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            try:
+                return func(*args, **kwargs)
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                kept = _traces(tracemalloc).compare_to(before, 'traceback')
+                phases.append((name, peak - start, current - start, kept))
+        return measured
+
+    wrapped = list(cmd._plan.runnable)
+    for opt in wrapped:
+        opt.run = measure(_phase_name(opt), opt.run)
+    cmd.execute = measure('execute', cmd.execute)
+
+    # Leave tracing on for a caller who was already tracing, as with
+    # PYTHONTRACEMALLOC, in which case its own traceback depth is kept
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(frames)
+    try:
+        return run()
+    finally:
+        peak = max([tracemalloc.get_traced_memory()[1]] +
+                   [phase[1] for phase in phases])
+        stats = _traces(tracemalloc).statistics('traceback')
+        if not tracing:
+            tracemalloc.stop()
+        for opt in wrapped:
+            del opt.run
+        del cmd.execute
+
+        with open(output, 'w') as f:
+            print("Peak traced memory: {0:.1f} KiB".format(peak / 1024.0),
+                  file=f)
+            for name, phase_peak, phase_kept, kept in phases:
+                print("\n{0}: peak {1:.1f} KiB, kept {2:.1f} KiB".format(
+                    name, phase_peak / 1024.0, phase_kept / 1024.0), file=f)
+                _write_stats([d for d in kept if d.size_diff > 0], f)
+            print("\nAllocations still held at the end:", file=f)
+            _write_stats(stats, f)
+
+        print("Allocations written to {0}".format(output), file=sys.stderr)
+        print("Peak traced memory: {0:.1f} KiB".format(peak / 1024.0),
+              file=sys.stderr)
+        for name, phase_peak, phase_kept, kept in phases:
+            print("  {0}: peak {1:.1f} KiB, kept {2:.1f} KiB".format(
+                name, phase_peak / 1024.0, phase_kept / 1024.0),
+                file=sys.stderr)
+        for stat in stats[:top]:
+            print(_describe(stat), file=sys.stderr)
+
+
+PROFILERS = {
+    'cprofile': (profile_cprofile, 'pstats'),
+    'sample': (profile_sample, 'folded'),
+    'tracemalloc': (profile_tracemalloc, 'txt'),
+}
@@ -0,0 +1,157 @@
+"""An interactive shell which runs a command once for each line entered.
+
+The command and its subcommands are loaded once and reused for every line,
+which is split like a shell would split it. Errors, including the
+`SystemExit` of a command, and interrupting a line with Ctrl-C, are
+reported without ending the session.
+"""
+
+from __future__ import print_function
+
+import shlex
+import sys
+import traceback
+
+from straight.command import InvalidArgument, SubCommand, UnknownArguments
+
+try:
+    _input = raw_input
+except NameError:
+    _input = input
+
+
+def subcommand_of(cmd, name):
+    """The loaded subcommand of `cmd` called `name`, or None.
+
+    Subcommands are loaded once and kept by their `SubCommand` option,
+    which then reuses them when they are run.
+    """
+
+    for opt in cmd.options:
+        if isinstance(opt, SubCommand) and opt.name == name:
+            if opt.subcmd is None or opt.subcmd.parent is not cmd:
+                opt.subcmd = opt.command_class(parent=cmd)
+            return opt.subcmd
+    return None
+
+
+def completions(cmd, words, prefix):
+    """Option flags and subcommand names which could complete `prefix`,
+    after the subcommands named in `words`.
+    """
+
+    for word in words:
+        subcmd = subcommand_of(cmd, word)
+        if subcmd is not None:
+            cmd = subcmd
+    names = []
+    for opt in cmd.options:
+        if isinstance(opt, SubCommand):
+            names.append(opt.name)
+        else:
+            names.extend(flag for flag in (opt.short, opt.long) if flag)
+    return sorted(name for name in names if name.startswith(prefix))
+
+
+class Completer(object):
+    """A readline completer for a command."""
+
+    def __init__(self, cmd, readline):
+        self.cmd = cmd
+        self.readline = readline
+        self.matches = []
+
+    def __call__(self, text, state):
+        if state == 0:
+            line = self.readline.get_line_buffer()
+            words = line[:self.readline.get_begidx()].split()
+            self.matches = completions(self.cmd, words, text)
+        try:
+            return self.matches[state] + ' '
+        except IndexError:
+            return None
+
+
+def run_line(cmd, line):
+    """Run `cmd` with the arguments in `line`, reporting rather than
+    raising any error or interruption. Returns the exit status.
+    """
+
+    try:
+        argv = shlex.split(line)
+    except ValueError as e:
+        print("Error: {0}".format(e), file=sys.stderr)
+        return 2
+    if not argv:
+        return 0
+
+    cmd.reset()
+    try:
+        cmd.run(argv)
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        return 130
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except (InvalidArgument, UnknownArguments) as e:
+        print("Unknown arguments: {0}".format(' '.join(e.args[0])
+              if isinstance(e.args[0], list) else e.args[0]),
+              file=sys.stderr)
+        return 2
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def shell(cmd, prompt=None, stdin=None, history_file=None):
+    """Read lines from `stdin`, or interactively with line editing, and run
+    `cmd` for each of them until the input ends.
+    """
+
+    if prompt is None:
+        prompt = '{0}> '.format(cmd.__class__.__name__.lower())
+
+    readline = None
+    if stdin is None:
+        try:
+            import readline
+        except ImportError:
+            pass
+        else:
+            readline.set_completer(Completer(cmd, readline))
+            readline.set_completer_delims(' \t\n')
+            readline.parse_and_bind('tab: complete')
+            if history_file:
+                try:
+                    readline.read_history_file(history_file)
+                except EnvironmentError:
+                    pass
+
+    try:
+        while True:
+            if stdin is None:
+                try:
+                    line = _input(prompt)
+                except EOFError:
+                    print()
+                    break
+                except KeyboardInterrupt:
+                    print()
+                    continue
+            else:
+                line = stdin.readline()
+                if not line:
+                    break
+            if line.strip() in ('exit', 'quit'):
+                break
+            run_line(cmd, line)
+    finally:
+        if readline is not None and history_file:
+            try:
+                readline.write_history_file(history_file)
+            except EnvironmentError:
+                pass
@@ -0,0 +1,150 @@
+"""Reading option values from config files and the environment.
+
+Parsed config files are kept as pickled snapshots in a cache directory,
+keyed by the file's modification time and size, so a large file is only
+parsed again once it has changed. Snapshots hold the values as parsed, and
+the options of the command reading them coerce them on every read, so a
+change to an option never meets a stale value.
+"""
+
+import hashlib
+import os
+import pickle
+
+
+_snapshots = {}
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'straight.command')
+
+
+def parse_config(path):
+    """Parse a JSON, TOML or INI file into a dictionary, chosen by the
+    extension of `path`. INI sections become nested dictionaries.
+    """
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        import json
+        with open(path) as f:
+            return json.load(f)
+    elif ext == '.toml':
+        try:
+            import tomllib as toml
+        except ImportError:
+            import toml
+            with open(path) as f:
+                return toml.load(f)
+        with open(path, 'rb') as f:
+            return toml.load(f)
+    else:
+        try:
+            from configparser import RawConfigParser
+        except ImportError:
+            from ConfigParser import RawConfigParser
+        parser = RawConfigParser()
+        parser.read([path])
+        data = dict(parser.defaults())
+        for section in parser.sections():
+            data[section] = dict(parser.items(section))
+        return data
+
+
+def _select(data, section):
+    """Flatten the top level values of `data` and those of `section`."""
+
+    values = {}
+    for key, value in data.items():
+        if not isinstance(value, dict):
+            values[key.replace('-', '_')] = value
+    nested = data.get(section)
+    if isinstance(nested, dict):
+        for key, value in nested.items():
+            values[key.replace('-', '_')] = value
+    return values
+
+
+def read_config(path, section, options, cache_dir=None):
+    """Read the values of `options` from the config file at `path`.
+
+    Values are taken from the top level of the file and from `section`,
+    and coerced by the option with the matching `dest`. Returns a
+    dictionary mapping dests to values.
+    """
+
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    stamp = (st.st_mtime, st.st_size)
+    ident = (path, section)
+
+    cached = _snapshots.get(ident)
+    if cached is not None and cached[0] == stamp:
+        raw = cached[1]
+    else:
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        digest = hashlib.sha1(repr(ident).encode('utf-8')).hexdigest()
+        snapshot = os.path.join(cache_dir, digest + '.pickle')
+
+        raw = _load_snapshot(snapshot, stamp)
+        if raw is None:
+            raw = _select(parse_config(path), section)
+            _save_snapshot(snapshot, stamp, raw)
+        _snapshots[ident] = (stamp, raw)
+
+    values = {}
+    for opt in options:
+        if opt.dest in raw:
+            values[opt.dest] = opt.from_source(raw[opt.dest])
+    return values
+
+
+def read_environ(options, prefix=None, environ=None):
+    """Read the values of `options` from environment variables, named by
+    each option's `env` or else by `prefix` and the upper-cased `dest`.
+    """
+
+    if environ is None:
+        environ = os.environ
+    values = {}
+    for opt in options:
+        name = opt.env
+        if name is None and prefix and opt.dest:
+            name = prefix + opt.dest.upper()
+        if name is not None and name in environ:
+            values[opt.dest] = opt.from_source(environ[name])
+    return values
+
+
+def _load_snapshot(snapshot, stamp):
+    try:
+        with open(snapshot, 'rb') as f:
+            saved_stamp, values = pickle.load(f)
+    except Exception:
+        return None
+    if saved_stamp != stamp:
+        return None
+    return values
+
+
+def _save_snapshot(snapshot, stamp, values):
+    """Write a snapshot atomically, giving up quietly if it can't be."""
+
+    tmp = '{0}.{1}.tmp'.format(snapshot, os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(snapshot)):
+            os.makedirs(os.path.dirname(snapshot))
+        with open(tmp, 'wb') as f:
+            pickle.dump((stamp, values), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, snapshot)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,206 @@
+"""Recording the latency of command invocations, and reporting on it.
+
+A command with a `telemetry_log` appends one JSON line to that file for
+each time it runs, giving the subcommand path, the seconds spent in each
+phase by the command and by each subcommand it ran, the number of
+arguments and the exit status. Records are handed to a background thread
+which writes them in batches, so recording never waits on the disk.
+`TelemetryStats` can be added as a subcommand to report on the log.
+"""
+
+from __future__ import print_function
+
+import atexit
+import json
+import math
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from straight.command import Command, Option, SubCommand
+
+
+class Recorder(threading.Thread):
+    """Appends records to `path` in batches of up to `batch_size`, written
+    at least every `interval` seconds. Records are dropped rather than
+    waited for if more than `max_pending` are waiting.
+    """
+
+    def __init__(self, path, batch_size=100, interval=1.0, max_pending=10000):
+        super(Recorder, self).__init__()
+        self.daemon = True
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = queue.Queue(max_pending)
+        self.finished = threading.Event()
+
+    def record(self, entry):
+        try:
+            self.pending.put_nowait(entry)
+        except queue.Full:
+            pass
+
+    def run(self):
+        while not self.finished.is_set():
+            self.finished.wait(self.interval)
+            self.write()
+
+    def write(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._append(batch)
+                batch = []
+        if batch:
+            self._append(batch)
+
+    def _append(self, batch):
+        try:
+            with open(self.path, 'a') as f:
+                f.write(''.join(json.dumps(e) + '\n' for e in batch))
+        except EnvironmentError:
+            pass
+
+    def stop(self, timeout=1.0):
+        self.finished.set()
+        self.join(timeout)
+
+
+_recorders = {}
+_lock = threading.Lock()
+
+
+def get_recorder(path):
+    with _lock:
+        recorder = _recorders.get(path)
+        if recorder is None:
+            recorder = _recorders[path] = Recorder(path)
+            recorder.start()
+            if len(_recorders) == 1:
+                atexit.register(_stop_all)
+        return recorder
+
+
+def _stop_all():
+    for recorder in list(_recorders.values()):
+        recorder.stop()
+
+
+def subcommand_chain(cmd):
+    """The subcommands `cmd` ran, in order, as pairs of the name each was
+    invoked by and the subcommand itself.
+    """
+
+    chain = []
+    while cmd.ran_subcommand is not None:
+        subcmd = cmd.ran_subcommand
+        for opt in cmd.options:
+            if isinstance(opt, SubCommand) and opt.subcmd is subcmd:
+                chain.append((opt.name, subcmd))
+                break
+        cmd = subcmd
+    return chain
+
+
+def record_run(cmd, arguments, run):
+    """Call `run(arguments)` and record how it went in the command's
+    `telemetry_log`.
+    """
+
+    status = 0
+    try:
+        return run(arguments)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else int(e.code is not None)
+        raise
+    except BaseException:
+        status = 1
+        raise
+    finally:
+        chain = subcommand_chain(cmd)
+        path = [cmd.__class__.__name__.lower()]
+        path.extend(name for name, _ in chain)
+        get_recorder(cmd.telemetry_log).record({
+            'time': time.time(),
+            'path': ' '.join(path),
+            'version': cmd.version,
+            'phases': dict(cmd.timings),
+            'subcommand_phases': [dict(subcmd.timings) for _, subcmd in chain],
+            'argc': len(arguments),
+            'status': status,
+        })
+
+
+def percentile(ordered, p):
+    """The nearest-rank percentile `p` of a sorted list."""
+
+    index = int(math.ceil(p / 100.0 * len(ordered))) - 1
+    return ordered[max(0, min(index, len(ordered) - 1))]
+
+
+def read_log(path):
+    """The well formed records of a log, as (path, version, seconds)."""
+
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                record = (entry['path'], entry['version'],
+                          float(sum(entry['phases'].values())))
+                hash(record)
+            except (ValueError, TypeError, KeyError, AttributeError):
+                continue
+            yield record
+
+
+class TelemetryStats(Command):
+    """Report latency percentiles from the telemetry log."""
+
+    log = Option(long='--log', help="The log to read, if not the parent's.")
+
+    def execute(self, log=None, **kwargs):
+        cmd = self
+        while not log and cmd is not None:
+            log = cmd.telemetry_log
+            cmd = cmd.parent
+        if not log:
+            print("No telemetry log to report on.", file=sys.stderr)
+            sys.exit(1)
+
+        # Durations for each path, by version in the order first seen
+        durations = {}
+        versions = {}
+        try:
+            records = list(read_log(log))
+        except EnvironmentError as e:
+            print("Cannot read telemetry log {0}: {1}".format(
+                log, e.strerror or e), file=sys.stderr)
+            sys.exit(1)
+        for path, version, seconds in records:
+            durations.setdefault((path, version), []).append(seconds)
+            versions.setdefault(path, [])
+            if version not in versions[path]:
+                versions[path].append(version)
+
+        print("{0:30} {1:>10} {2:>7} {3:>9} {4:>9} {5:>9}".format(
+            'subcommand', 'version', 'runs', 'p50 ms', 'p95 ms', 'p99 ms'),
+            file=self.out)
+        for path in sorted(versions):
+            for version in versions[path]:
+                ordered = sorted(durations[(path, version)])
+                print("{0:30} {1:>10} {2:>7} {3:>9.1f} {4:>9.1f} {5:>9.1f}"
+                      .format(path, version, len(ordered),
+                              percentile(ordered, 50) * 1000,
+                              percentile(ordered, 95) * 1000,
+                              percentile(ordered, 99) * 1000),
+                      file=self.out)
@@ -18,6 +18,8 @@ class PrimeOption(Option):
     action = 'store_true'
     nargs = 1
     help = "Determine if the number is a prime number."
+    lazy = True
+    provides = ('total_is_prime',)
 
     def run(self, cmd):
         enable = cmd.args[self.dest]
@@ -77,6 +79,20 @@ class Rot13SubCommand(SubCommand):
     name = 'rot13'
     command_class = Rot13Command
 
+class QuickSumCommand(Command):
+    """Sums without checking for primes. `--prime` is still accepted, but
+    PrimeOption is lazy and nothing here needs `total_is_prime`, so it
+    never runs.
+    """
+
+    summation = SumOption()
+    prime = PrimeOption()
+    needs = ('total',)
+
+    def execute(self, **kwargs):
+        print('total =', kwargs['total'])
+
+
 class TestCommand(Command):
 
     version = "0.5"
@@ -86,6 +102,7 @@ class TestCommand(Command):
     prime = PrimeOption()
     name = Option(long='--name')
     rot13 = Rot13SubCommand()
+    quick = SubCommand('quick', QuickSumCommand)
 
     def execute(self, total=None, total_is_prime=False, **kwargs):
         print('total =', total)
@@ -0,0 +1,129 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from straight.command import Command, Option, SubCommand
+
+
+class Report(Command):
+    cacheable = True
+
+    x = Option(long='--x', dest='x', action='store')
+
+    def execute(self, x=None, **kwargs):
+        Report.runs += 1
+        print("x is", x)
+        print("via out", x, file=self.out)
+        return x
+
+
+class Top(Command):
+    cacheable = True
+
+    report = SubCommand('report', Report)
+
+
+class Read(Command):
+    cacheable = True
+    cache_inputs = ('path',)
+
+    path = Option(long='--path', dest='path', action='store')
+
+    def execute(self, path=None, **kwargs):
+        Read.runs += 1
+        with open(path) as f:
+            self.out.write(f.read())
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        for cls in (Top, Report, Read):
+            cls.cache_dir = self.cache_dir
+        Report.runs = Read.runs = 0
+
+    def tearDown(self):
+        for cls in (Top, Report, Read):
+            del cls.cache_dir
+        if 'cache_size' in vars(Report):
+            del Report.cache_size
+        shutil.rmtree(self.cache_dir)
+
+    def cached(self):
+        return set(os.listdir(self.cache_dir))
+
+    def test_subcommand_arguments_are_keyed(self):
+        one, two = Top().run_many([['report', '--x=1'], ['report', '--x=2']])
+        self.assertEqual(one.stdout, "x is 1\nvia out 1\n")
+        self.assertEqual(two.stdout, "x is 2\nvia out 2\n")
+        self.assertEqual(Report.runs, 2)
+
+    def test_hit_replays_output_and_value(self):
+        first, second = Top().run_many([['report', '--x=1']] * 2)
+        self.assertEqual(Report.runs, 1)
+        self.assertEqual(second.stdout, first.stdout)
+        self.assertEqual(second.stdout, "x is 1\nvia out 1\n")
+
+        first, second = Report().run_many([['--x=3']] * 2)
+        self.assertEqual(Report.runs, 2)
+        self.assertEqual(second.stdout, "x is 3\nvia out 3\n")
+        self.assertEqual(second.value, '3')
+
+
+    def test_no_cache(self):
+        argv = ['--no-cache', '--x=1']
+        first, second = Report().run_many([argv, argv])
+        self.assertEqual(Report.runs, 2)
+        self.assertEqual(second.stdout, "x is 1\nvia out 1\n")
+        self.assertEqual(second.value, '1')
+        self.assertEqual(self.cached(), set())
+
+    def test_input_modified(self):
+        path = os.path.join(self.cache_dir, 'input')
+        with open(path, 'w') as f:
+            f.write('one\n')
+        os.utime(path, (1000000, 1000000))
+        argv = ['--path=' + path]
+        self.assertEqual(Read().run_many([argv, argv])[1].stdout, 'one\n')
+        self.assertEqual(Read.runs, 1)
+
+        # The same size, but modified later
+        with open(path, 'w') as f:
+            f.write('two\n')
+        os.utime(path, (2000000, 2000000))
+        self.assertEqual(Read().run_many([argv])[0].stdout, 'two\n')
+        self.assertEqual(Read.runs, 2)
+
+    def test_least_recently_used_evicted(self):
+        names = {}
+        for x in '123':
+            before = self.cached()
+            Report().run_many([['--x=' + x]])
+            name, = self.cached() - before
+            names[x] = name
+            stamp = 1000000 * int(x)
+            os.utime(os.path.join(self.cache_dir, name), (stamp, stamp))
+        self.assertEqual(Report.runs, 3)
+
+        # Using the oldest makes it the most recently used
+        Report().run_many([['--x=1']])
+        self.assertEqual(Report.runs, 3)
+
+        size = os.path.getsize(os.path.join(self.cache_dir, names['1']))
+        Report.cache_size = 3 * size
+        Report().run_many([['--x=4']])
+        self.assertEqual(len(self.cached()), 3)
+        self.assertNotIn(names['2'], self.cached())
+
+        Report().run_many([['--x=1'], ['--x=3']])
+        self.assertEqual(Report.runs, 4)
+        Report().run_many([['--x=2']])
+        self.assertEqual(Report.runs, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import time
+import unittest
+
+from straight.command import Command, Option, SubCommand
+
+
+class Slow(Command):
+    delay = Option(long='--delay', dest='delay', action='store',
+                   coerce=float)
+
+    def execute(self, delay=None, **kwargs):
+        if delay:
+            time.sleep(delay)
+        return 'done'
+
+
+class SlowOption(Option):
+    long = '--slow-option'
+    dest = 'slow_option'
+    action = 'store_true'
+
+    def run(self, cmd):
+        if cmd.args[self.dest]:
+            time.sleep(0.05)
+
+
+class Budgeted(Slow):
+    phase_budgets = {'options': 0.001, 'execute': 0.001}
+
+    slow_option = SlowOption()
+
+
+class Remaining(Command):
+
+    def execute(self, **kwargs):
+        return self.remaining()
+
+
+class Parent(Command):
+    phase_budgets = {'options': 0.01}
+
+    sub = SubCommand('sub', Remaining)
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_zero_deadline(self):
+        result, = Slow().run_many([['--deadline=0']])
+        self.assertEqual(result.status, 124)
+
+    def test_checked_after_execute(self):
+        result, = Slow().run_many([['--deadline=0.01', '--delay=0.05']])
+        self.assertEqual(result.status, 124)
+        self.assertIn("during execute", result.stderr)
+
+    def test_within_deadline(self):
+        result, = Slow().run_many([['--deadline=10']])
+        self.assertEqual((result.status, result.value), (0, 'done'))
+
+
+    def test_execute_budget(self):
+        result, = Budgeted().run_many([['--deadline=10', '--delay=0.05']])
+        self.assertEqual(result.status, 124)
+        self.assertIn("during execute", result.stderr)
+
+    def test_options_budget(self):
+        result, = Budgeted().run_many([['--deadline=10', '--slow-option']])
+        self.assertEqual(result.status, 124)
+        self.assertIn("during option slow_option", result.stderr)
+
+    def test_within_budgets(self):
+        result, = Budgeted().run_many([['--deadline=10']])
+        self.assertEqual((result.status, result.value), (0, 'done'))
+        self.assertEqual(Budgeted().run(['--delay=0.05']), 'done')
+
+    def test_subcommand_given_phase_budget(self):
+        cmd = Parent()
+        cmd.run(['sub'], deadline=10)
+        self.assertLessEqual(cmd.ran_subcommand.remaining(), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from straight.command import discovery
+
+
+PLUGINS = {
+    ('dtest', 'first', 'one.py'): '''
+        from straight.command import Option
+
+        class __plugin__:
+            imply_plugins = ['dtest.second']
+
+        class OneOption(Option):
+            dest = 'one'
+    ''',
+    ('dtest', 'second', 'two.py'): '''
+        from straight.command import Option
+
+        class TwoOption(Option):
+            dest = 'two'
+
+            class __plugin__:
+                imply_plugins = ['dtest.first', 'dtest.third']
+    ''',
+    ('dtest', 'third', 'three.py'): '''
+        from straight.command import Option
+
+        class ThreeOption(Option):
+            dest = 'three'
+    ''',
+}
+
+
+class DiscoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for parts, source in PLUGINS.items():
+            directory = os.path.join(self.root, *parts[:-1])
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(os.path.join(directory, parts[-1]), 'w') as f:
+                f.write(textwrap.dedent(source))
+        sys.path.insert(0, self.root)
+
+    def tearDown(self):
+        sys.path.remove(self.root)
+        for name in list(sys.modules):
+            if name.startswith('dtest'):
+                del sys.modules[name]
+        shutil.rmtree(self.root)
+
+    def test_imply_plugins(self):
+        for workers in (None, 2):
+            discovery._found.clear()
+            options, subcommands = discovery.discover(['dtest.first'], workers)
+            self.assertEqual(sorted(cls.__name__ for cls in options),
+                             ['OneOption', 'ThreeOption', 'TwoOption'])
+            self.assertEqual(subcommands, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds `import straight.command` may take, including the standard
+# modules it imports, in the best of `RUNS` fresh interpreters after the
+# first, which may have to compile it.
+BUDGET = 15.0
+RUNS = 3
+
+# Standard modules too slow to import on every run of a command
+SLOW_MODULES = ('re', 'typing', 'pkgutil', 'inspect', 'logging',
+                'importlib.util', 'straight.plugin')
+
+
+def import_straight_command():
+    """Import straight.command in a fresh interpreter. Returns the
+    cumulative import time in milliseconds, and the modules it imported.
+    """
+
+    script = ("import sys; before = set(sys.modules); "
+              "import straight.command; "
+              "print('\\n'.join(set(sys.modules) - before))")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # Let the first run write bytecode, so later ones don't time compiling
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', script],
+                            cwd=ROOT, env=env, universal_newlines=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise AssertionError(err)
+
+    cumulative = None
+    for line in err.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if fields[2].strip() == 'straight.command':
+            cumulative = int(fields[1]) / 1000.0
+    return cumulative, set(out.split())
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def test_no_slow_modules(self):
+        _, imported = import_straight_command()
+        self.assertEqual(sorted(imported.intersection(SLOW_MODULES)), [])
+
+    def test_within_budget(self):
+        import_straight_command()
+        best = min(import_straight_command()[0] for _ in range(RUNS))
+        self.assertLess(best, BUDGET,
+                        "importing straight.command took {0:.1f}ms, over "
+                        "the {1}ms budget".format(best, BUDGET))
+
+
+if __name__ == '__main__':
+    unittest.main()
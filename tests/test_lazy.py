@@ -0,0 +1,48 @@
+import unittest
+
+from straight.command import Command, Option
+
+
+class SquareOption(Option):
+    long = '--n'
+    dest = 'n'
+    action = 'store'
+    coerce = int
+    lazy = True
+    provides = ('square',)
+
+    def run(self, cmd):
+        SquareOption.runs += 1
+        cmd.args['square'] = cmd.args['n'] ** 2
+
+
+class Plain(Command):
+    n = SquareOption()
+    needs = ('n',)
+
+    def execute(self, **kwargs):
+        return kwargs.get('square')
+
+
+class Squared(Plain):
+    needs = ('n', 'square')
+
+
+class LazyOptionTest(unittest.TestCase):
+
+    def setUp(self):
+        SquareOption.runs = 0
+
+    def test_skipped_when_not_needed(self):
+        with self.assertLogs('straight.command', 'DEBUG'):
+            cmd = Plain()
+        self.assertIsNone(cmd.run(['--n=3']))
+        self.assertEqual(SquareOption.runs, 0)
+
+    def test_run_when_needed(self):
+        self.assertEqual(Squared().run(['--n=3']), 9)
+        self.assertEqual(SquareOption.runs, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from straight.command import Command, Output
+
+
+class CountingBytesIO(io.BytesIO):
+
+    def __init__(self):
+        super(CountingBytesIO, self).__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super(CountingBytesIO, self).write(data)
+
+
+def text_stream():
+    binary = CountingBytesIO()
+    return io.TextIOWrapper(binary, encoding='utf-8', write_through=True)
+
+
+class Cat(Command):
+
+    def execute(self, **kwargs):
+        self.out.send_file(Cat.path, chunk_size=Cat.chunk_size)
+
+
+class OutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_file(self, data):
+        path = os.path.join(self.tmp, 'data')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_buffers_text_and_bytes_in_order(self):
+        stream = text_stream()
+        out = Output(buffering=1024, stream=stream)
+        for i in range(100):
+            out.write(u'a')
+            out.write_bytes(b'b')
+        self.assertEqual(stream.buffer.writes, 0)
+        out.flush()
+        self.assertEqual(stream.buffer.getvalue(), b'ab' * 100)
+
+    def test_small_binary_writes_are_joined(self):
+        stream = text_stream()
+        out = Output(buffering=1024, stream=stream)
+        for i in range(100):
+            out.write_bytes(b'x')
+        out.flush()
+        self.assertEqual(stream.buffer.getvalue(), b'x' * 100)
+        self.assertEqual(stream.buffer.writes, 1)
+
+    def test_unbuffered(self):
+        stream = text_stream()
+        out = Output(buffering=0, stream=stream)
+        out.write(u'a')
+        out.write_bytes(b'b')
+        self.assertEqual(stream.buffer.getvalue(), b'ab')
+
+    def test_decodes_characters_split_across_chunks(self):
+        Cat.path = self.write_file(
+            b'a' * 5 + u'é'.encode('utf-8') + b'b' * 5)
+        Cat.chunk_size = 6
+        result, = Cat().run_many([[]])
+        self.assertEqual(result.stdout, u'a' * 5 + u'é' + u'b' * 5)
+
+    def test_send_file_to_file_descriptor(self):
+        data = u'héllo\n'.encode('utf-8') * 1000
+        path = self.write_file(data)
+        target = os.path.join(self.tmp, 'target')
+        with io.open(target, 'w', encoding='utf-8') as stream:
+            out = Output(stream=stream)
+            out.write(u'start\n')
+            out.send_file(path)
+            out.write(u'end\n')
+            out.flush()
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), b'start\n' + data + b'end\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
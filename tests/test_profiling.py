@@ -0,0 +1,69 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from straight.command import Command, Option
+
+
+class Work(Command):
+    size = Option(long='--size', dest='size', action='store', coerce=int)
+
+    def execute(self, size=None, **kwargs):
+        total = sum(len(str(i)) for i in range(size or 1000))
+        print("total", total)
+        return total
+
+
+class ProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def profile(self, mode, size=2000):
+        output = os.path.join(self.tmp, mode)
+        argv = ['--size={0}'.format(size)]
+        plain, = Work().run_many([argv])
+        result, = Work().run_many([argv + ['--profile=' + mode,
+                                           '--profile-output=' + output]])
+        self.assertEqual(result.status, 0, result.stderr)
+        self.assertEqual(result.value, plain.value)
+        self.assertEqual(result.stdout, plain.stdout)
+        self.assertIn(output, result.stderr)
+        with open(output, 'rb') as f:
+            self.assertTrue(f.read())
+        return output
+
+    def test_cprofile(self):
+        import pstats
+        output = self.profile('cprofile')
+        self.assertTrue(pstats.Stats(output).total_calls)
+
+    def test_sample(self):
+        # Long enough to be sampled at least once
+        self.profile('sample', size=200000)
+
+    def test_tracemalloc(self):
+        with open(self.profile('tracemalloc')) as f:
+            report = f.read()
+        self.assertIn("Peak traced memory", report)
+        self.assertIn("execute: peak", report)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_tracemalloc_already_tracing(self):
+        tracemalloc.start()
+        try:
+            self.profile('tracemalloc')
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
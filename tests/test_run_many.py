@@ -0,0 +1,62 @@
+from __future__ import print_function
+
+import sys
+import unittest
+
+from straight.command import Command, Option
+
+
+class Echo(Command):
+    word = Option(long='--word', dest='word', action='store')
+
+    def execute(self, word=None, **kwargs):
+        if word == 'boom':
+            raise RuntimeError("boom")
+        if word == 'quit':
+            sys.exit(3)
+        print(word)
+        print("to stderr", file=sys.stderr)
+        return word
+
+
+class RunManyTest(unittest.TestCase):
+
+    def test_status_and_output(self):
+        result, = Echo().run_many([['--word=hello']])
+        self.assertEqual(result.argv, ['--word=hello'])
+        self.assertEqual(result.value, 'hello')
+        self.assertEqual(result.status, 0)
+        self.assertEqual(result.stdout, "hello\n")
+        self.assertEqual(result.stderr, "to stderr\n")
+        self.assertIsNone(result.error)
+
+    def test_exit_status(self):
+        result, = Echo().run_many([['--word=quit']])
+        self.assertEqual(result.status, 3)
+
+    def test_error_in_batch(self):
+        before, failed, after = Echo().run_many(
+            [['--word=a'], ['--word=boom'], ['--word=b']])
+        self.assertEqual((before.status, before.value), (0, 'a'))
+        self.assertEqual((after.status, after.value), (0, 'b'))
+        self.assertEqual(failed.status, 1)
+        self.assertIsInstance(failed.error, RuntimeError)
+        self.assertIn("RuntimeError: boom", failed.stderr)
+
+    def test_conflicting_short_circuit(self):
+        result, = Echo().run_many([['--help', '--version']])
+        self.assertEqual(result.status, 1)
+        self.assertIsInstance(result.error, ValueError)
+
+    def test_processes(self):
+        argvs = [['--word={0}'.format(i)] for i in range(4)]
+        argvs.insert(2, ['--word=boom'])
+        results = Echo().run_many(argvs, processes=2)
+        self.assertEqual([r.value for r in results],
+                         ['0', '1', None, '2', '3'])
+        self.assertEqual([r.status for r in results], [0, 0, 1, 0, 0])
+        self.assertEqual(results[3].stdout, "2\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import sys
+import unittest
+
+from straight.command import Command, Option
+from straight.command.shell import run_line
+
+
+class Do(Command):
+    action = Option(long='--do', dest='action', action='store')
+
+    def execute(self, action=None, **kwargs):
+        Do.done.append(action)
+        if action == 'fail':
+            raise RuntimeError("failed")
+        if action == 'quit':
+            sys.exit(2)
+        if action == 'interrupt':
+            raise KeyboardInterrupt()
+
+
+class ShellTest(unittest.TestCase):
+
+    def setUp(self):
+        Do.done = []
+        self.stderr = sys.stderr
+        sys.stderr = io.StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+
+    def test_session(self):
+        stdin = io.StringIO(u'--do=one\n'
+                            u'--do=fail\n'
+                            u'--do=quit\n'
+                            u'--do=interrupt\n'
+                            u'--bad\n'
+                            u'\n'
+                            u'--do=two\n'
+                            u'exit\n'
+                            u'--do=three\n')
+        Do().shell(stdin=stdin)
+        self.assertEqual(Do.done, ['one', 'fail', 'quit', 'interrupt', 'two'])
+        errors = sys.stderr.getvalue()
+        self.assertIn("RuntimeError: failed", errors)
+        self.assertIn("Interrupted", errors)
+        self.assertIn("Unknown arguments: --bad", errors)
+
+    def test_statuses(self):
+        cmd = Do()
+        self.assertEqual(run_line(cmd, '--do=one'), 0)
+        self.assertEqual(run_line(cmd, '--do=fail'), 1)
+        self.assertEqual(run_line(cmd, '--do=quit'), 2)
+        self.assertEqual(run_line(cmd, '--do=interrupt'), 130)
+        self.assertEqual(run_line(cmd, '--bad'), 2)
+        self.assertEqual(run_line(cmd, '"unclosed'), 2)
+        self.assertEqual(run_line(cmd, ''), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from straight.command import Command, Option, SubCommand
+from straight.command import sources
+
+
+class Sub(Command):
+    level = Option(long='--level', dest='level', action='store', coerce=int)
+
+    def execute(self, level=None, **kwargs):
+        Sub.seen = level
+
+
+class Top(Command):
+    env_prefix = 'STRAIGHT_TEST_'
+
+    number = Option(long='--number', dest='number', action='store',
+                    coerce=int)
+    sub = SubCommand('sub', Sub)
+
+    def execute(self, number=None, **kwargs):
+        if not self.ran_subcommand:
+            return number
+
+
+class SourcesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        self.path = os.path.join(self.tmp, 'config.json')
+        Top.config_files = (self.path,)
+        Top.config_cache_dir = self.cache_dir
+        self.environ = dict(os.environ)
+        sources._snapshots.clear()
+
+    def tearDown(self):
+        del Top.config_files, Top.config_cache_dir
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.tmp)
+
+    def write_config(self, data, mtime=None):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_layering(self):
+        self.write_config({'number': 1})
+        self.assertEqual(Top().run([]), 1)
+        os.environ['STRAIGHT_TEST_NUMBER'] = '2'
+        self.assertEqual(Top().run([]), 2)
+        self.assertEqual(Top().run(['--number=3']), 3)
+
+    def test_subcommand_inherits(self):
+        self.write_config({'sub': {'level': 4}})
+        Top().run(['sub'])
+        self.assertEqual(Sub.seen, 4)
+        self.assertTrue(os.listdir(self.cache_dir))
+
+        os.environ['STRAIGHT_TEST_LEVEL'] = '5'
+        Top().run(['sub'])
+        self.assertEqual(Sub.seen, 5)
+
+    def test_snapshot_invalidation(self):
+        self.write_config({'number': 1}, mtime=1000000)
+        self.assertEqual(Top().run([]), 1)
+
+        # Same size, new modification time
+        self.write_config({'number': 2}, mtime=2000000)
+        self.assertEqual(Top().run([]), 2)
+
+        # Same modification time, new size
+        self.write_config({'number': 30}, mtime=2000000)
+        self.assertEqual(Top().run([]), 30)
+
+        # Read back from the snapshot on disk, without parsing the file
+        sources._snapshots.clear()
+        parse_config = sources.parse_config
+        sources.parse_config = None
+        try:
+            self.assertEqual(Top().run([]), 30)
+        finally:
+            sources.parse_config = parse_config
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from straight.command import Command, SubCommand
+from straight.command import telemetry
+from straight.command.telemetry import TelemetryStats, percentile
+
+
+class Add(Command):
+
+    def execute(self, **kwargs):
+        return 'added'
+
+
+class Todo(Command):
+    version = '1.0'
+
+    add = SubCommand('add', Add)
+    stats = SubCommand('stats', TelemetryStats)
+
+
+class TelemetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, 'telemetry.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_record_run(self):
+        Todo.telemetry_log = self.log
+        try:
+            Todo().run(['add'])
+        finally:
+            del Todo.telemetry_log
+            telemetry._recorders.pop(self.log).stop()
+
+        with open(self.log) as f:
+            record, = [json.loads(line) for line in f]
+        self.assertEqual(record['path'], 'todo add')
+        self.assertEqual(record['version'], '1.0')
+        self.assertEqual(record['argc'], 1)
+        self.assertEqual(record['status'], 0)
+        self.assertIn('parse', record['phases'])
+        self.assertIn('execute', record['subcommand_phases'][0])
+
+    def test_percentile(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 50)
+        self.assertEqual(percentile(ordered, 95), 95)
+        self.assertEqual(percentile(ordered, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_stats(self):
+        with open(self.log, 'w') as f:
+            for ms in range(1, 101):
+                f.write(json.dumps({'path': 'todo add', 'version': '1.0',
+                                    'phases': {'execute': ms / 1000.0}}))
+                f.write('\n')
+            f.write('not json\n')
+            f.write('{"path": "todo add"}\n')
+
+        result, = Todo().run_many([['stats', '--log=' + self.log]])
+        self.assertEqual(result.status, 0, result.stderr)
+        header, row = result.stdout.splitlines()
+        self.assertEqual(header.split()[-3:], ['ms', 'p99', 'ms'])
+        self.assertEqual(row.split(),
+                         ['todo', 'add', '1.0', '100', '50.0', '95.0', '99.0'])
+
+    def test_stats_missing_log(self):
+        missing = os.path.join(self.tmp, 'missing.log')
+        result, = Todo().run_many([['stats', '--log=' + missing]])
+        self.assertEqual(result.status, 1)
+        self.assertIn("Cannot read telemetry log", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()